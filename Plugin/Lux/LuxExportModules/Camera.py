@@ -23,6 +23,9 @@ from maya import cmds
 
 from ExportModule import ExportModule
 
+_degrees = math.degrees
+_sqrt = math.sqrt
+
 class Camera(ExportModule):
     """
     Camera ExportModule. Responsible for detecting the type of the given
@@ -30,6 +33,8 @@ class Camera(ExportModule):
     """
     
     DOF_CONST = 0 # this should be (1000 * (scene scale factor)), I think. :S
+    
+    DEBUG_UP_AXIS = False # True to check the cached up axis conversion against checkUpAxis per point
 
     def __init__(self, dagPath, width, height):
         """
@@ -45,8 +50,26 @@ class Camera(ExportModule):
         
         self.scale = 1.0
         
+        # fieldofview must follow the axis that InsertCommon's screenwindow
+        # maps to +/-1, which is the longer image side
+        if height < width:
+            self.fieldOfViewFn = self.camera.horizontalFieldOfView
+        else:
+            self.fieldOfViewFn = self.camera.verticalFieldOfView
+        
         self.sceneScale = self.getSceneScaleFactor()
         self.DOF_CONST = 1000 # * self.sceneScale
+        
+        # the up axis conversion is the same for every point, so ask
+        # checkUpAxis for it once instead of once per point.
+        # NB: this assumes checkUpAxis(M) returns M * R (right multiplication),
+        # which is what makes point * R equal to the translation of
+        # checkUpAxis(translate(point)), and that it leaves Z-Up scenes alone.
+        # Set DEBUG_UP_AXIS to check this against the per point matrix path.
+        if OpenMaya.MGlobal.isZAxisUp():
+            self.upAxisMatrix = None
+        else:
+            self.upAxisMatrix = self.checkUpAxis(OpenMaya.MMatrix())
     #end def __init__
 
     def getOutput(self):
@@ -95,28 +118,24 @@ class Camera(ExportModule):
         ratio = float(self.outWidth) / float(self.outHeight)
         invRatio = 1/ratio
         
+        # screen window centre and half extents
+        scale = self.scale
         if ratio > 1.0:
-            screenwindow = [ ( (2 * shiftX) - 1 ) * self.scale,
-                             ( (2 * shiftX) + 1 ) * self.scale,
-                             ( (2 * shiftY) - invRatio ) * self.scale,
-                             ( (2 * shiftY) + invRatio ) * self.scale
-                           ]
+            wx, wy = scale, scale * invRatio
         else:
-            screenwindow = [ ( (2 * shiftX) - ratio ) * self.scale,
-                             ( (2 * shiftX) + ratio ) * self.scale,
-                             ( (2 * shiftY) - 1 ) * self.scale,
-                             ( (2 * shiftY) + 1 ) * self.scale
-                           ]
+            wx, wy = scale * ratio, scale
+        sx = 2 * shiftX * scale
+        sy = 2 * shiftY * scale
         
-        self.addToOutput( '\tscene.camera.screenwindow = %f %f %f %f' % (screenwindow[0], screenwindow[1], screenwindow[2], screenwindow[3]) )
         #self.addToOutput( '\t"float frameaspectratio" [%f]' % ratio )
         
         #self.addToOutput( '\t"float hither" [%f]' % (self.camera.nearClippingPlane()*self.sceneScale) )
         #self.addToOutput( '\t"float yon" [%f]' % (self.camera.farClippingPlane()*self.sceneScale) )
-        self.addToOutput( '\tscene.camera.shutteropen = %f' % 0.0 )
         
         exposure_time = cmds.getAttr( 'lux_settings.camera_exposuretime' )
-        self.addToOutput( '\tscene.camera.shutterclose = %f' % exposure_time )
+        self.addToOutput( f'\tscene.camera.screenwindow = {sx - wx:f} {sx + wx:f} {sy - wy:f} {sy + wy:f}\n'
+                          '\tscene.camera.shutteropen = 0.000000\n'
+                          f'\tscene.camera.shutterclose = {exposure_time:f}' )
         
     #end def InsertCommon
 
@@ -128,20 +147,10 @@ class Camera(ExportModule):
         
         try:
             eye = self.camera.eyePoint(OpenMaya.MSpace.kWorld)
-        except:
-            OpenMaya.MGlobal.displayError( "Failed to get camera.eyePoint\n" )
-            raise
-             
-        try:
             up = self.camera.upDirection(OpenMaya.MSpace.kWorld)
-        except:
-            OpenMaya.MGlobal.displayError( "Failed to get camera.upDirection\n" )
-            raise
-             
-        try:
             at = self.camera.centerOfInterestPoint(OpenMaya.MSpace.kWorld)
-        except:
-            OpenMaya.MGlobal.displayError( "Failed to get camera.centerOfInterestPoint\n" )
+        except Exception as e:
+            OpenMaya.MGlobal.displayError( f"Failed to get camera vectors: {e}\n" )
             raise
          
         # Convert to Z-Up if necessary
@@ -149,10 +158,9 @@ class Camera(ExportModule):
         at  = self.pointCheckUpAxis(at)
         up  = self.pointCheckUpAxis(up)
          
-        self.addToOutput ( '\tscene.camera.lookat.orig = %f %f %f' % (eye.x, eye.y, eye.z) )
-        self.addToOutput ( '\tscene.camera.lookat.target = %f %f %f' % (at.x, at.y, at.z) )
-        self.addToOutput ( '\tscene.camera.up = %f %f %f' % (up.x, up.y, up.z) )
-        self.addToOutput ( '' )
+        self.addToOutput ( f'\tscene.camera.lookat.orig = {eye.x:f} {eye.y:f} {eye.z:f}\n'
+                           f'\tscene.camera.lookat.target = {at.x:f} {at.y:f} {at.z:f}\n'
+                           f'\tscene.camera.up = {up.x:f} {up.y:f} {up.z:f}\n' )
     #end def InsertLookat
     
     def pointCheckUpAxis(self, point):
@@ -161,6 +169,29 @@ class Camera(ExportModule):
         convert if necessary. 
         """
         
+        if self.upAxisMatrix is None:
+            result = point
+        else:
+            # always go through MPoint so vectors (eg. the up direction) pick
+            # up any translation in the matrix, like the per point path does
+            result = OpenMaya.MPoint(point.x, point.y, point.z) * self.upAxisMatrix
+        
+        if self.DEBUG_UP_AXIS:
+            checked = self.pointCheckUpAxisMatrix(point)
+            if not OpenMaya.MVector(result.x, result.y, result.z).isEquivalent(checked, 1e-6):
+                OpenMaya.MGlobal.displayWarning( f"Camera up axis conversion mismatch: "
+                                                 f"{result.x:f} {result.y:f} {result.z:f} != "
+                                                 f"{checked.x:f} {checked.y:f} {checked.z:f}" )
+            return checked
+        
+        return result
+    
+    def pointCheckUpAxisMatrix(self, point):
+        """
+        Reference version of pointCheckUpAxis, converting the point through
+        checkUpAxis via a translation matrix. Only used with DEBUG_UP_AXIS.
+        """
+        
         pointTM = OpenMaya.MTransformationMatrix()
         pointTM.setTranslation(OpenMaya.MVector(point.x, point.y, point.z), OpenMaya.MSpace.kWorld)
         pointM = pointTM.asMatrix()
@@ -186,12 +217,7 @@ class Camera(ExportModule):
         TODO: include self.sceneScale where necessary
         """
         
-        if self.outHeight < self.outWidth:
-             cFOV = math.degrees( self.camera.horizontalFieldOfView() )
-        else:
-            cFOV = math.degrees( self.camera.verticalFieldOfView() )   
-        
-        filmdiag = math.sqrt( self.camera.horizontalFilmAperture() * self.camera.verticalFilmAperture() )
+        filmdiag = _sqrt( self.camera.horizontalFilmAperture() * self.camera.verticalFilmAperture() )
         fstop = self.camera.fStop()
         dofdist = self.camera.centerOfInterest()
         focal = self.camera.focalLength() / self.DOF_CONST
@@ -199,10 +225,10 @@ class Camera(ExportModule):
         filmdistance = dofdist * focal / (dofdist - focal)
         
         self.addToOutput( '\tscene.camera.type = realistic' )
-        self.addToOutput( '\t"string specfile" ["%s"]' % 'E:/dev/luxrender/lux/cameras/realistic/wide.22mm.dat' )
-        self.addToOutput( '\t"float filmdistance" [%f]' % filmdistance )
-        self.addToOutput( '\t"float aperture_diameter" [%f]' % aperture_diameter )
-        self.addToOutput( '\t"float filmdiag" [%f]' % filmdiag ) 
+        self.addToOutput( '\t"string specfile" ["E:/dev/luxrender/lux/cameras/realistic/wide.22mm.dat"]' )
+        self.addToOutput( f'\t"float filmdistance" [{filmdistance:f}]' )
+        self.addToOutput( f'\t"float aperture_diameter" [{aperture_diameter:f}]' )
+        self.addToOutput( f'\t"float filmdiag" [{filmdiag:f}]' ) 
         
         self.InsertCommon()
         #self.addToOutput( '' )
@@ -215,14 +241,11 @@ class Camera(ExportModule):
         
         self.addToOutput ( '\tscene.camera.type = perspective' )
         
-        if self.outHeight < self.outWidth:
-             cFOV = math.degrees( self.camera.horizontalFieldOfView() )
-        else:
-            cFOV = math.degrees( self.camera.verticalFieldOfView() )
+        cFOV = _degrees( self.fieldOfViewFn() )
             
         auto_focus = self.intToBoolString( cmds.getAttr( 'lux_settings.camera_autofocus' ) )
-        self.addToOutput ( '\tscene.camera.autofocus.enable = %s' % auto_focus )
-        self.addToOutput ( '\tscene.camera.fieldofview = %f' % cFOV )
+        self.addToOutput ( f'\tscene.camera.autofocus.enable = {auto_focus}' )
+        self.addToOutput ( f'\tscene.camera.fieldofview = {cFOV:f}' )
         self.InsertCommon( )
         #self.addToOutput ( '' )
         